@@ -541,16 +541,20 @@ class Controller:
         self.data_manager.update_mapping(**changes)
         self.save()
 
-    def create_mapping(self):
-        """Create a new empty mapping in the active_preset."""
+    def create_mapping(self) -> bool:
+        """Create a new empty mapping in the active_preset.
+
+        Returns False if there already is an empty mapping.
+        """
         try:
             self.data_manager.create_mapping()
         except KeyError:
             # there is already an empty mapping
-            return
+            return False
 
         self.data_manager.load_mapping(combination=InputCombination.empty_combination())
         self.data_manager.update_mapping(**MAPPING_DEFAULTS)
+        return True
 
     def delete_mapping(self):
         """Remove the active_mapping form the active_preset."""
@@ -182,6 +182,25 @@ class GlobalUInputs:
         uinput.write(*event)
         uinput.syn()
 
+    def write_batch(self, events: List[Tuple[int, int, int]], target_uinput):
+        """Write multiple events to the target uinput, followed by a single syn.
+
+        Either all or none of the events are written.
+        """
+        uinput = self.get_uinput(target_uinput)
+        if not uinput:
+            raise inputremapper.exceptions.UinputNotAvailable(target_uinput)
+
+        for event in events:
+            if not uinput.can_emit(event):
+                raise inputremapper.exceptions.EventNotHandled(event)
+
+        for event in events:
+            logger.write(event, uinput)
+            uinput.write(*event)
+
+        uinput.syn()
+
     def get_uinput(self, name: str) -> Optional[evdev.UInput]:
         """UInput with name
 
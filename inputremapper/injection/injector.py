@@ -343,6 +343,10 @@ class Injector(multiprocessing.Process):
             if msg == InjectorCommand.CLOSE:
                 logger.debug("Received close signal")
                 self._stop_event.set()
+                # Stop handlers that write on their own, like AbsToRelHandler, even
+                # if an event reader doesn't get to reset the context before the loop
+                # stops. Otherwise their tasks would be destroyed while pending.
+                self.context.reset()
                 # give the event pipeline some time to reset devices
                 # before shutting the loop down
                 await asyncio.sleep(0.1)
@@ -18,10 +18,7 @@
 # along with input-remapper.  If not, see <https://www.gnu.org/licenses/>.
 
 import asyncio
-import math
-import time
-from functools import partial
-from typing import Dict, Tuple, Optional
+from typing import Any, Callable, Coroutine, Dict, Hashable, List, Tuple, Optional
 
 import evdev
 from evdev.ecodes import (
@@ -56,79 +53,45 @@ from inputremapper.utils import get_evdev_constant_name
 def calculate_output(value, weight, remainder):
     # self._value is between 0 and 1, scale up with weight
     scaled = value * weight + remainder
-    # float_value % 1 will result in wrong calculations for negative values
-    remainder = math.fmod(scaled, 1)
-    return int(scaled), remainder
-
-
-# TODO move into class?
-async def _run_normal_output(self) -> None:
-    """Start injecting events."""
-    self._running = True
-    self._stop = False
-    remainder = 0.0
-    start = time.time()
-
-    # if the rate is configured to be slower than the default, increase the value, so
-    # that the overall speed stays the same.
-    rate_compensation = DEFAULT_REL_RATE / self.mapping.rel_rate
-    weight = REL_XY_SCALING * rate_compensation
-
-    while not self._stop:
-        value, remainder = calculate_output(
-            self._value,
-            weight,
-            remainder,
-        )
-
-        self._write(EV_REL, self.mapping.output_code, value)
-
-        time_taken = time.time() - start
-        sleep = max(0.0, (1 / self.mapping.rel_rate) - time_taken)
-        await asyncio.sleep(sleep)
-        start = time.time()
-
-    self._running = False
-
-
-# TODO move into class?
-async def _run_wheel_output(self, codes: Tuple[int, int]) -> None:
-    """Start injecting wheel events.
+    # int() truncates towards zero, so the difference has the same sign as scaled,
+    # just like math.fmod(scaled, 1). float_value % 1 would be wrong for negative
+    # values.
+    output = int(scaled)
+    return output, scaled - output
 
-    made to inject both REL_WHEEL and REL_WHEEL_HI_RES events, because otherwise
-    wheel output doesn't work for some people. See issue #354
-    """
-    weights = (WHEEL_SCALING, WHEEL_HI_RES_SCALING)
 
-    self._running = True
-    self._stop = False
-    remainder = [0.0, 0.0]
-    start = time.time()
-    while not self._stop:
-        for i in range(len(codes)):
-            value, remainder[i] = calculate_output(
-                self._value,
-                weights[i],
-                remainder[i],
-            )
+# wheel output codes, mapped to both the codes that should be written
+WHEEL_OUTPUT_CODES: Dict[int, Tuple[int, int]] = {
+    REL_WHEEL: (REL_WHEEL, REL_WHEEL_HI_RES),
+    REL_WHEEL_HI_RES: (REL_WHEEL, REL_WHEEL_HI_RES),
+    REL_HWHEEL: (REL_HWHEEL, REL_HWHEEL_HI_RES),
+    REL_HWHEEL_HI_RES: (REL_HWHEEL, REL_HWHEEL_HI_RES),
+}
 
-            self._write(EV_REL, codes[i], value)
+# when falling behind the rate, only yield to the event loop on every nth tick
+YIELD_INTERVAL_WHEN_BEHIND = 8
 
-        time_taken = time.time() - start
-        await asyncio.sleep(max(0.0, (1 / self.mapping.rel_rate) - time_taken))
-        start = time.time()
 
-    self._running = False
+def _wake_up(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
 
 
 class AbsToRelHandler(MappingHandler):
     """Handler which transforms an EV_ABS to EV_REL events."""
 
     _map_axis: InputConfig  # the InputConfig for the axis we map
+    _input_match_hash: Hashable  # of _map_axis
     _value: float  # the current output value
-    _running: bool  # if the run method is active
-    _stop: bool  # if the run loop should return
+    _task: Optional[asyncio.Task]  # runs _run, created on the first movement
+    _active: asyncio.Event  # set while events should be written
+    _wakeup: Optional[asyncio.Future]  # awaited while sleeping until the next tick
     _transform: Optional[Transformation]
+    _codes: Tuple[int, int]  # the wheel and hi-res wheel codes, for wheel output
+    _weight: float  # scales the transformed value, for non-wheel output
+    _period: float  # seconds between two written events
+    _ticks_behind: int  # how often the deadline of a tick has been missed
+    _run: Callable[[], Coroutine[Any, Any, None]]
 
     def __init__(
         self,
@@ -141,28 +104,29 @@ class AbsToRelHandler(MappingHandler):
         # find the input event we are supposed to map
         assert (map_axis := combination.find_analog_input_config(type_=EV_ABS))
         self._map_axis = map_axis
+        # input_match_hash is a property that builds a new tuple on each access
+        self._input_match_hash = map_axis.input_match_hash
 
         self._value = 0
-        self._running = False
-        self._stop = True
+        self._task = None
+        self._active = asyncio.Event()
+        self._wakeup = None
         self._transform = None
+        self._period = 1 / self.mapping.rel_rate
+        self._ticks_behind = 0
 
         # bind the correct run method
-        if self.mapping.output_code in (
-            REL_WHEEL,
-            REL_HWHEEL,
-            REL_WHEEL_HI_RES,
-            REL_HWHEEL_HI_RES,
-        ):
-            if self.mapping.output_code in (REL_WHEEL, REL_WHEEL_HI_RES):
-                codes = (REL_WHEEL, REL_WHEEL_HI_RES)
-            else:
-                codes = (REL_HWHEEL, REL_HWHEEL_HI_RES)
-
-            self._run = partial(_run_wheel_output, self, codes=codes)
-
+        wheel_codes = WHEEL_OUTPUT_CODES.get(self.mapping.output_code)
+        if wheel_codes is not None:
+            self._codes = wheel_codes
+            self._run = self._run_wheel_output
         else:
-            self._run = partial(_run_normal_output, self)
+            # if the rate is configured to be slower than the default, increase the
+            # value, so that the overall speed stays the same.
+            rate_compensation = DEFAULT_REL_RATE / self.mapping.rel_rate
+            self._weight = REL_XY_SCALING * rate_compensation
+
+            self._run = self._run_normal_output
 
     def __str__(self):
         name = get_evdev_constant_name(*self._map_axis.type_and_code)
@@ -179,46 +143,187 @@ class AbsToRelHandler(MappingHandler):
             f"{self.mapping.target_uinput}"
         )
 
-    def notify(
-        self,
-        event: InputEvent,
-        source: evdev.InputDevice,
-        suppress: bool = False,
-    ) -> bool:
-        if event.input_match_hash != self._map_axis.input_match_hash:
+    def notify(self, event: InputEvent, source: evdev.InputDevice, *_, **__) -> bool:
+        # most events that reach this are not for this handler, check that first
+        if event.input_match_hash != self._input_match_hash:
             return False
 
         if EventActions.recenter in event.actions:
-            self._stop = True
+            self._deactivate()
             return True
 
-        if not self._transform:
-            absinfo = {
-                entry[0]: entry[1]
-                for entry in source.capabilities(absinfo=True)[EV_ABS]
-            }
-            self._transform = Transformation(
-                max_=absinfo[event.code].max,
-                min_=absinfo[event.code].min,
-                deadzone=self.mapping.deadzone,
-                gain=self.mapping.gain,
-                expo=self.mapping.expo,
-            )
+        if self._transform is None:
+            self._transform = self._create_transform(source, event.code)
 
         transformed = self._transform(event.value)
 
         self._value = transformed
 
         if transformed == 0:
-            self._stop = True
+            self._deactivate()
             return True
 
-        if not self._running:
-            asyncio.ensure_future(self._run())
+        self._active.set()
+
+        if self._task is None:
+            # The task is kept alive between movements and waits for _active,
+            # instead of starting a new one each time the axis leaves the center.
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
         return True
 
     def reset(self) -> None:
-        self._stop = True
+        self._deactivate()
+
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _deactivate(self) -> None:
+        """Stop writing events until the next movement."""
+        self._active.clear()
+
+        # don't let the loop sleep until the end of the current tick
+        if self._wakeup is not None:
+            _wake_up(self._wakeup)
+
+    async def _run_normal_output(self) -> None:
+        """Inject events whenever the handler is active, until cancelled."""
+        loop = asyncio.get_running_loop()
+
+        # the mapping doesn't change while injecting, avoid looking those up each tick
+        write = self._write
+        code = self.mapping.output_code
+        weight = self._weight
+        type_ = EV_REL
+
+        while True:
+            await self._active.wait()
+
+            remainder = 0.0
+            deadline = loop.time() + self._period
+
+            while self._active.is_set():
+                value, remainder = calculate_output(
+                    self._value,
+                    weight,
+                    remainder,
+                )
+
+                if value != 0:
+                    # avoid a call for each tick in which the movement is too slow to
+                    # produce any output, until the remainder adds up
+                    write(type_, code, value)
+
+                deadline = await self._sleep_until(loop, deadline)
+
+    async def _run_wheel_output(self) -> None:
+        """Inject wheel events whenever the handler is active, until cancelled.
+
+        made to inject both REL_WHEEL and REL_WHEEL_HI_RES events, because otherwise
+        wheel output doesn't work for some people. See issue #354
+        """
+        loop = asyncio.get_running_loop()
+
+        # avoid looking up globals and attributes each tick
+        write_batch = self._write_batch
+        wheel_code, hi_res_code = self._codes
+        wheel_weight = WHEEL_SCALING
+        hi_res_weight = WHEEL_HI_RES_SCALING
+        type_ = EV_REL
+
+        while True:
+            await self._active.wait()
+
+            wheel_remainder = 0.0
+            hi_res_remainder = 0.0
+            deadline = loop.time() + self._period
+
+            while self._active.is_set():
+                # both events are written at once, followed by a single syn
+                events = []
+
+                # same as calculate_output, inlined to avoid two function calls
+                value = self._value
+
+                scaled = value * wheel_weight + wheel_remainder
+                output = int(scaled)
+                wheel_remainder = scaled - output
+                if output != 0:
+                    events.append((type_, wheel_code, output))
+
+                scaled = value * hi_res_weight + hi_res_remainder
+                output = int(scaled)
+                hi_res_remainder = scaled - output
+                if output != 0:
+                    events.append((type_, hi_res_code, output))
+
+                if events:
+                    write_batch(events)
+
+                deadline = await self._sleep_until(loop, deadline)
+
+    async def _sleep_until(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        deadline: float,
+    ) -> float:
+        """Sleep until the deadline of the current tick and return the next deadline.
+
+        Scheduling against a deadline on the monotonic loop clock, instead of
+        measuring how long each iteration took, prevents the rate from drifting.
+        Returns early if the handler is deactivated.
+        """
+        now = loop.time()
+        if now - deadline > self._period:
+            # fell behind by more than a tick, don't try to catch up with a burst of
+            # events, just continue at the regular rate from now on.
+            deadline = now
+
+        if deadline > now:
+            # Like asyncio.sleep, but _deactivate can resolve the future early. This
+            # avoids creating a task for asyncio.wait_for on each tick.
+            wakeup = loop.create_future()
+            handle = loop.call_at(deadline, _wake_up, wakeup)
+            self._wakeup = wakeup
+            try:
+                await wakeup
+            finally:
+                handle.cancel()
+                self._wakeup = None
+        else:
+            # Already late for this tick. Going through the event loop with a sleep
+            # of 0 every time is wasted while saturated, but other coroutines still
+            # need to get a chance to run every now and then.
+            self._ticks_behind += 1
+            if self._ticks_behind % YIELD_INTERVAL_WHEN_BEHIND == 0:
+                await asyncio.sleep(0)
+
+        return deadline + self._period
+
+    def _create_transform(
+        self,
+        source: evdev.InputDevice,
+        code: int,
+    ) -> Transformation:
+        """Create the Transformation based on the absinfo of the source device.
+
+        This is done once on the first event, because the source is not known
+        before.
+        """
+        for abs_code, absinfo in source.capabilities(absinfo=True)[EV_ABS]:
+            if abs_code == code:
+                break
+        else:
+            raise KeyError(f"{source.path} has no absinfo for code {code}")
+
+        return Transformation(
+            max_=absinfo.max,
+            min_=absinfo.min,
+            deadzone=self.mapping.deadzone,
+            gain=self.mapping.gain,
+            expo=self.mapping.expo,
+        )
 
     def _write(self, type_, keycode, value):
         """Inject."""
@@ -233,6 +338,14 @@ class AbsToRelHandler(MappingHandler):
             # screwed up the calculation of mouse movements
             logger.error("OverflowError (%s, %s, %s)", type_, keycode, value)
 
+    def _write_batch(self, events: List[Tuple[int, int, int]]):
+        """Inject multiple events at once."""
+        try:
+            global_uinputs.write_batch(events, self.mapping.target_uinput)
+        except OverflowError:
+            # screwed up the calculation of mouse movements
+            logger.error("OverflowError %s", events)
+
     def needs_wrapping(self) -> bool:
         return len(self.input_configs) > 1
 
@@ -26,13 +26,7 @@ import time
 import evdev
 from evdev.ecodes import KEY_A, KEY_B, KEY_C
 
-import gi
-
-gi.require_version("Gdk", "3.0")
-gi.require_version("Gtk", "3.0")
-gi.require_version("GLib", "2.0")
-gi.require_version("GtkSource", "4")
-from gi.repository import Gtk, GLib, GtkSource, Gdk
+from tests.lib.gtk import Gtk, GLib, GtkSource, Gdk
 
 from tests.lib.cleanup import quick_cleanup
 from tests.lib.stuff import spy
@@ -26,10 +26,7 @@ import multiprocessing
 import unittest
 import time
 
-import gi
-
-gi.require_version("Gtk", "3.0")
-from gi.repository import Gtk
+from tests.lib.gtk import Gtk
 
 from inputremapper.daemon import Daemon, BUS_NAME
 
@@ -24,7 +24,7 @@ import asyncio
 from tests.test import get_project_root
 
 from contextlib import contextmanager
-from typing import Tuple, List, Optional, Iterable
+from typing import Tuple, List, Optional, Iterable, Callable, Dict, Hashable, FrozenSet
 
 from inputremapper.gui.autocompletion import (
     get_incomplete_parameter,
@@ -37,11 +37,14 @@ from tests.lib.stuff import spy
 from tests.lib.constants import EVENT_READ_TIMEOUT
 from tests.lib.fixtures import prepare_presets
 from tests.lib.logger import logger
-from tests.lib.fixtures import fixtures
+from tests.lib.fixtures import fixtures, Fixture
 from tests.lib.pipes import push_event, push_events, uinput_write_history_pipe
 from tests.integration.test_components import FlowBoxTestUtils
 
 import sys
+import shutil
+from itertools import groupby
+import tempfile
 import time
 import atexit
 import os
@@ -56,19 +59,13 @@ from evdev.ecodes import (
     KEY_Q,
     EV_REL,
 )
-from unittest.mock import patch, MagicMock, call
+from unittest.mock import patch, MagicMock
 from importlib.util import spec_from_loader, module_from_spec
 from importlib.machinery import SourceFileLoader
 
 from inputremapper.input_event import InputEvent
 
-import gi
-
-gi.require_version("Gdk", "3.0")
-gi.require_version("Gtk", "3.0")
-gi.require_version("GtkSource", "4")
-gi.require_version("GLib", "2.0")
-from gi.repository import Gtk, GLib, Gdk, GtkSource
+from tests.lib.gtk import Gtk, GLib, Gdk, GtkSource
 
 from inputremapper.configs.system_mapping import system_mapping
 from inputremapper.configs.mapping import Mapping
@@ -104,6 +101,21 @@ Gtk.main = gtk_iteration
 # doesn't do much except avoid some Gtk assertion error, whatever:
 Gtk.main_quit = lambda: None
 
+# the combinations of the mappings that prepare_presets writes into preset1 and
+# preset2 of "Foo Device"
+PRESET1_COMBINATIONS = frozenset(
+    {
+        InputCombination([InputConfig(type=1, code=1)]),
+        InputCombination([InputConfig(type=1, code=2)]),
+    }
+)
+PRESET2_COMBINATIONS = frozenset(
+    {
+        InputCombination([InputConfig(type=1, code=3)]),
+        InputCombination([InputConfig(type=1, code=4)]),
+    }
+)
+
 
 def launch(
     argv=None,
@@ -120,7 +132,9 @@ def launch(
         module = module_from_spec(spec)
         spec.loader.exec_module(module)
 
-    gtk_iteration()
+    # process the events that the ui queued while starting, but don't hang if
+    # something keeps adding new ones
+    wait_until(lambda: not Gtk.events_pending(), timeout=0.5)
 
     # otherwise a new handler is added with each call to launch, which
     # spams tons of garbage when all tests finish
@@ -135,6 +149,31 @@ def launch(
     )
 
 
+def wait_until(predicate: Callable[[], bool], timeout=1.0, tick=0.001) -> bool:
+    """Process GTK events until the predicate is true, or the timeout is reached.
+
+    Returns True if the predicate was satisfied. Pending GTK events are
+    processed before the predicate is checked, unless something keeps adding
+    new ones until the timeout is reached.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        drained = False
+        while Gtk.events_pending() and time.monotonic() < deadline:
+            Gtk.main_iteration_do(False)
+            drained = True
+
+        if predicate():
+            return True
+
+        if time.monotonic() >= deadline:
+            return False
+
+        if not drained:
+            # only sleep if gtk is idle, otherwise check again right away
+            time.sleep(tick)
+
+
 def start_reader_service():
     def process():
         reader_service = ReaderService(_Groups())
@@ -144,12 +183,30 @@ def start_reader_service():
     multiprocessing.Process(target=process).start()
 
 
+# Handlers that can intercept commands before they reach os.system. A handler
+# returns None if it doesn't care about the command. This is installed once,
+# instead of patching and restoring os.system for each test.
+_os_system_handlers: Dict[Hashable, Callable[[str], Optional[int]]] = {}
+_original_os_system = os.system
+
+
+def _os_system(cmd):
+    for handler in _os_system_handlers.values():
+        result = handler(cmd)
+        if result is not None:
+            return result
+
+    return _original_os_system(cmd)
+
+
+os.system = _os_system
+
+
 @contextmanager
 def patch_launch():
     """patch the launch function such that we don't connect to
     the dbus and don't use pkexec to start the reader-service"""
     original_connect = Daemon.connect
-    original_os_system = os.system
     Daemon.connect = Daemon
 
     def os_system(cmd):
@@ -160,11 +217,11 @@ def patch_launch():
             start_reader_service()
             return 0
 
-        return original_os_system(cmd)
+        return None
 
-    os.system = os_system
+    _os_system_handlers[patch_launch] = os_system
     yield
-    os.system = original_os_system
+    del _os_system_handlers[patch_launch]
     Daemon.connect = original_connect
 
 
@@ -200,7 +257,6 @@ class TestGroupsFromReaderService(unittest.TestCase):
         # this is already part of the test. we need a bit of patching and hacking
         # because we want to discover the groups as early a possible, to reduce startup
         # time for the application
-        self.original_os_system = os.system
         self.reader_service_started = MagicMock()
 
         def os_system(cmd):
@@ -211,9 +267,9 @@ class TestGroupsFromReaderService(unittest.TestCase):
                 self.reader_service_started()
                 return 0
 
-            return self.original_os_system(cmd)
+            return None
 
-        os.system = os_system
+        _os_system_handlers[id(self)] = os_system
         (
             self.user_interface,
             self.controller,
@@ -224,7 +280,7 @@ class TestGroupsFromReaderService(unittest.TestCase):
 
     def tearDown(self):
         clean_up_integration(self)
-        os.system = self.original_os_system
+        del _os_system_handlers[id(self)]
         Daemon.connect = self.original_connect
 
     def test_knows_devices(self):
@@ -239,9 +295,7 @@ class TestGroupsFromReaderService(unittest.TestCase):
         start_reader_service()
         # perform some iterations so that the reader ends up reading from the pipes
         # which will make it receive devices.
-        for _ in range(10):
-            time.sleep(0.02)
-            gtk_iteration()
+        wait_until(lambda: "Foo Device 2" in self.data_manager.get_group_keys())
 
         self.assertIn("Foo Device 2", self.data_manager.get_group_keys())
         self.assertIn("Foo Device 2", self.data_manager.get_group_keys())
@@ -284,8 +338,33 @@ class PatchedConfirmDelete:
 
 
 class GuiTestBase(unittest.TestCase):
-    def setUp(self):
+    @classmethod
+    def setUpClass(cls):
+        # prepare_presets sleeps to give each preset a different modification time.
+        # Do that only once, and copy the result into the config dir for each test.
+        cls._presets_snapshot = tempfile.TemporaryDirectory(
+            prefix="input-remapper-test-presets"
+        )
         prepare_presets()
+        shutil.copytree(
+            get_config_path(),
+            cls._presets_snapshot.name,
+            dirs_exist_ok=True,
+        )
+
+        # InputCombinations are immutable, so all tests can share this one
+        cls.empty_combination = InputCombination.empty_combination()
+
+        # the origin_hash of events from the Foo Device 2 fixtures
+        cls.keyboard_origin = fixtures.foo_device_2_keyboard.get_device_hash()
+        cls.gamepad_origin = fixtures.foo_device_2_gamepad.get_device_hash()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._presets_snapshot.cleanup()
+
+    def setUp(self):
+        self._restore_presets()
         with patch_launch():
             (
                 self.user_interface,
@@ -317,6 +396,14 @@ class GuiTestBase(unittest.TestCase):
         self.create_mapping_btn: Gtk.Button = get("create_mapping_button")
         self.delete_mapping_btn: Gtk.Button = get("delete-mapping")
 
+        # the text of the code editor is cached until its buffer changes
+        self._code_buffer = self.code_editor.get_buffer()
+        self._code_text: Optional[str] = None
+        self._code_buffer.connect("changed", self._on_code_buffer_changed)
+
+        # group_key -> DeviceGroupEntry, filled by click_on_group
+        self._group_entries: Dict[str, DeviceGroupEntry] = {}
+
         self._test_initial_state()
 
         self.grab_fails = False
@@ -329,8 +416,6 @@ class GuiTestBase(unittest.TestCase):
 
         global_config._save_config()
 
-        self.throttle(20)
-
         self.assertIsNotNone(self.data_manager.active_group)
         self.assertIsNotNone(self.data_manager.active_preset)
 
@@ -340,15 +425,46 @@ class GuiTestBase(unittest.TestCase):
         # this is important, otherwise it keeps breaking things in the background
         self.assertIsNone(self.data_manager._reader_client._read_timeout)
 
-        self.throttle(20)
+        gtk_iteration()
 
-    def get_code_input(self):
-        buffer = self.code_editor.get_buffer()
-        return buffer.get_text(
-            buffer.get_start_iter(),
-            buffer.get_end_iter(),
-            True,
+    def _restore_presets(self):
+        """Write the presets of prepare_presets, keeping their modification times.
+
+        Anything else that is in the config directory is removed.
+        """
+        shutil.rmtree(get_config_path(), ignore_errors=True)
+        shutil.copytree(
+            self._presets_snapshot.name,
+            get_config_path(),
+            dirs_exist_ok=True,
         )
+        global_config.load_config()
+
+    def get_code_input(self):
+        if self._code_text is None:
+            buffer = self._code_buffer
+            self._code_text = buffer.get_text(
+                buffer.get_start_iter(),
+                buffer.get_end_iter(),
+                True,
+            )
+
+        return self._code_text
+
+    def _on_code_buffer_changed(self, *_):
+        self._code_text = None
+
+    def set_code_input(self, text: str):
+        """Replace the text of the code editor and process the resulting events."""
+        # set_text deletes and then inserts, so property notifications would be
+        # emitted for both steps otherwise
+        self._code_buffer.freeze_notify()
+        try:
+            self._code_buffer.set_text(text)
+        finally:
+            self._code_buffer.thaw_notify()
+
+        gtk_iteration()
 
     def _test_initial_state(self):
         # make sure each test deals with the same initial state
@@ -397,16 +513,86 @@ class GuiTestBase(unittest.TestCase):
         # to fail. By using this (and by optimizing some redundant calls in the gui) it
         # worked again. EDIT: Might have been caused by my broken/bloated ssd. I'll
         # keep it in some places, since it did make the tests more reliable after all.
-        for _ in range(time_ // 2):
-            gtk_iteration()
-            time.sleep(0.002)
+        wait_until(lambda: False, time_ / 1000)
+
+    def run_until_stable(self, timeout=1.0):
+        """Process GTK events until everything that was queued so far is done.
+
+        An idle callback only runs once no higher priority source is ready, so
+        by the time it fires, the work caused by earlier calls has been processed.
+        """
+        done = []
+
+        def mark_done():
+            done.append(True)
+            return False
+
+        GLib.idle_add(mark_done)
+        self.assertTrue(
+            wait_until(lambda: len(done) > 0, timeout),
+            "main loop did not settle",
+        )
+
+    def click(self, button: Gtk.Button):
+        """Click the button and process the events that this causes."""
+        button.clicked()
+        gtk_iteration()
+
+    def flush_debounce(self):
+        """Call all debounced functions that are waiting, instead of sleeping."""
+        # let gtk finish the layout first, the autocompletion reads cursor positions
+        gtk_iteration()
+        debounce_manager.run_all_now()
+        gtk_iteration()
+
+    def push_and_wait(
+        self,
+        fixture: Fixture,
+        events: List[InputEvent],
+        message_type: MessageType,
+        count=1,
+        timeout=1.0,
+    ):
+        """Push events and process GTK events until message_type was sent count
+        times by the message_broker, or the timeout is reached."""
+        messages = []
+
+        def listener(data):
+            messages.append(data)
+
+        self.message_broker.subscribe(message_type, listener)
+        try:
+            push_events(fixture, events)
+            self.assertTrue(
+                wait_until(lambda: len(messages) >= count, timeout),
+                f"{message_type} was sent {len(messages)} times instead of {count}",
+            )
+        finally:
+            self.message_broker.unsubscribe(listener)
+
+        return messages
+
+    def record_combination(
+        self,
+        fixture: Fixture,
+        codes: Iterable[int],
+    ) -> InputCombination:
+        """Record pressing and then releasing the keys for the active mapping.
+
+        Returns the resulting input_combination of the active_mapping.
+        """
+        self.controller.start_key_recording()
+        events = [InputEvent.key(code, 1) for code in codes]
+        events += [InputEvent.key(code, 0) for code in codes]
+        self.push_and_wait(fixture, events, MessageType.recording_finished)
+        return self.data_manager.active_mapping.input_combination
 
     def set_focus(self, widget):
         logger.info("Focusing %s", widget)
 
         self.user_interface.window.set_focus(widget)
 
-        self.throttle(20)
+        gtk_iteration()
 
     def focus_source_view(self):
         # despite the focus and gtk_iterations, gtk never runs the event handlers for
@@ -422,13 +608,15 @@ class GuiTestBase(unittest.TestCase):
     def get_selection_labels(self) -> List[MappingSelectionLabel]:
         return self.selection_label_listbox.get_children()
 
+    def get_row_combinations(self) -> FrozenSet[InputCombination]:
+        return frozenset(label.combination for label in self.get_selection_labels())
+
     def get_status_text(self):
         status_bar = self.user_interface.get("status_bar")
         return status_bar.get_message_area().get_children()[0].get_label()
 
     def get_unfiltered_symbol_input_text(self):
-        buffer = self.code_editor.get_buffer()
-        return buffer.get_text(buffer.get_start_iter(), buffer.get_end_iter(), True)
+        return self.get_code_input()
 
     def select_mapping(self, i: int):
         """Select one of the mappings of a preset.
@@ -452,36 +640,38 @@ class GuiTestBase(unittest.TestCase):
 
     def add_mapping(self, mapping: Optional[Mapping] = None):
         self.controller.create_mapping()
-        self.controller.load_mapping(InputCombination.empty_combination())
-        gtk_iteration()
+        self.controller.load_mapping(self.empty_combination)
+        self.run_until_stable()
         if mapping:
             self.controller.update_mapping(**mapping.dict(exclude_defaults=True))
-            gtk_iteration()
+            self.run_until_stable()
 
     def sleep(self, num_events):
         for _ in range(num_events * 2):
             time.sleep(EVENT_READ_TIMEOUT)
             gtk_iteration()
 
-        time.sleep(1 / 30)  # one window iteration
-
         gtk_iteration()
 
 
 class TestColors(GuiTestBase):
     # requires a running ui, otherwise fails with segmentation faults
-    def test_get_color_falls_back(self):
+    def test_colors(self):
+        # the lookups only read from the theme, so they share one launched ui
+        # no subTests, failures have to raise so that _callTestMethod can retry
+        self._test_get_color_falls_back()
+        self._test_get_color_works()
+        self._test_get_colors()
+
+    def _test_get_color_falls_back(self):
         fallback = Gdk.RGBA(0, 0.5, 1, 0.8)
 
         color = Colors.get_color(["doesnt_exist_1234"], fallback)
 
         self.assertIsInstance(color, Gdk.RGBA)
-        self.assertAlmostEqual(color.red, fallback.red, delta=0.01)
-        self.assertAlmostEqual(color.green, fallback.green, delta=0.01)
-        self.assertAlmostEqual(color.blue, fallback.blue, delta=0.01)
-        self.assertAlmostEqual(color.alpha, fallback.alpha, delta=0.01)
+        self.assertLess(self._color_delta(color, fallback), 0.01)
 
-    def test_get_color_works(self):
+    def _test_get_color_works(self):
         fallback = Gdk.RGBA(1, 0, 1, 0.1)
 
         color = Colors.get_color(
@@ -494,20 +684,25 @@ class TestColors(GuiTestBase):
         self.assertNotAlmostEquals(color.blue, fallback.green, delta=0.01)
         self.assertNotAlmostEquals(color.alpha, fallback.alpha, delta=0.01)
 
+    @staticmethod
+    def _color_delta(color: Gdk.RGBA, other: Gdk.RGBA) -> float:
+        """The largest difference between the channels of two colors."""
+        return max(
+            abs(color.red - other.red),
+            abs(color.green - other.green),
+            abs(color.blue - other.blue),
+            abs(color.alpha - other.alpha),
+        )
+
     def _test_color_wont_fallback(self, get_color, fallback):
         color = get_color()
         self.assertIsInstance(color, Gdk.RGBA)
-        if (
-            (abs(color.green - fallback.green) < 0.01)
-            and (abs(color.red - fallback.red) < 0.01)
-            and (abs(color.blue - fallback.blue) < 0.01)
-            and (abs(color.alpha - fallback.alpha) < 0.01)
-        ):
+        if self._color_delta(color, fallback) < 0.01:
             raise AssertionError(
-                f"Color {color.to_string()} is similar to {fallback.toString()}"
+                f"Color {color.to_string()} is similar to {fallback.to_string()}"
             )
 
-    def test_get_colors(self):
+    def _test_get_colors(self):
         self._test_color_wont_fallback(Colors.get_accent_color, Colors.fallback_accent)
         self._test_color_wont_fallback(Colors.get_border_color, Colors.fallback_border)
         self._test_color_wont_fallback(
@@ -527,11 +722,20 @@ class TestGui(GuiTestBase):
     """
 
     def click_on_group(self, group_key: str):
-        for child in self.device_selection.get_children():
-            device_group_entry = child.get_children()[0]
+        device_group_entry = self._group_entries.get(group_key)
+        if device_group_entry is None or not device_group_entry.is_ancestor(
+            self.device_selection
+        ):
+            # the entries are recreated when the groups change, look them up again
+            self._group_entries = {}
+            for child in self.device_selection.get_children():
+                entry = child.get_children()[0]
+                self._group_entries[entry.group_key] = entry
+
+            device_group_entry = self._group_entries.get(group_key)
 
-            if device_group_entry.group_key == group_key:
-                device_group_entry.set_active(True)
+        if device_group_entry is not None:
+            device_group_entry.set_active(True)
 
     def test_can_start(self):
         self.assertIsNotNone(self.user_interface)
@@ -688,152 +892,135 @@ class TestGui(GuiTestBase):
     def test_events_from_reader_service_arrive(self):
         # load a device with more capabilities
         self.controller.load_group("Foo Device 2")
-        gtk_iteration()
-        mock1 = MagicMock()
-        mock2 = MagicMock()
-        mock3 = MagicMock()
-        self.message_broker.subscribe(MessageType.combination_recorded, mock1)
-        self.message_broker.subscribe(MessageType.recording_finished, mock2)
-        self.message_broker.subscribe(MessageType.recording_started, mock3)
+        self.run_until_stable()
+        recorded = []
+        finished = []
+        started = []
+        self.message_broker.subscribe(MessageType.combination_recorded, recorded.append)
+        self.message_broker.subscribe(MessageType.recording_finished, finished.append)
+        self.message_broker.subscribe(MessageType.recording_started, started.append)
         self.recording_toggle.set_active(True)
-        mock3.assert_called_once()
+        self.assertEqual(len(started), 1)
         gtk_iteration()
 
-        push_events(
+        self.push_and_wait(
             fixtures.foo_device_2_keyboard,
             [
                 InputEvent(0, 0, 1, 30, 1),
                 InputEvent(0, 0, 1, 31, 1),
             ],
+            MessageType.combination_recorded,
+            count=2,
         )
-        self.throttle(60)
-        origin = fixtures.foo_device_2_keyboard.get_device_hash()
-        mock1.assert_has_calls(
-            (
-                call(
-                    CombinationRecorded(
-                        InputCombination(
-                            [InputConfig(type=1, code=30, origin_hash=origin)]
-                        )
-                    )
+        origin = self.keyboard_origin
+        self.assertEqual(
+            recorded,
+            [
+                CombinationRecorded(
+                    InputCombination([InputConfig(type=1, code=30, origin_hash=origin)])
                 ),
-                call(
-                    CombinationRecorded(
-                        InputCombination(
-                            [
-                                InputConfig(type=1, code=30, origin_hash=origin),
-                                InputConfig(type=1, code=31, origin_hash=origin),
-                            ]
-                        )
+                CombinationRecorded(
+                    InputCombination(
+                        [
+                            InputConfig(type=1, code=30, origin_hash=origin),
+                            InputConfig(type=1, code=31, origin_hash=origin),
+                        ]
                     )
                 ),
-            ),
-            any_order=False,
+            ],
         )
-        self.assertEqual(mock1.call_count, 2)
-        mock2.assert_not_called()
+        self.assertEqual(len(finished), 0)
 
-        push_events(fixtures.foo_device_2_keyboard, [InputEvent(0, 0, 1, 31, 0)])
+        push_event(fixtures.foo_device_2_keyboard, InputEvent(0, 0, 1, 31, 0))
         self.throttle(60)
-        self.assertEqual(mock1.call_count, 2)
-        mock2.assert_not_called()
+        self.assertEqual(len(recorded), 2)
+        self.assertEqual(len(finished), 0)
 
-        push_events(fixtures.foo_device_2_keyboard, [InputEvent(0, 0, 1, 30, 0)])
-        self.throttle(60)
-        self.assertEqual(mock1.call_count, 2)
-        mock2.assert_called_once()
+        self.push_and_wait(
+            fixtures.foo_device_2_keyboard,
+            [InputEvent(0, 0, 1, 30, 0)],
+            MessageType.recording_finished,
+        )
+        self.assertEqual(len(recorded), 2)
+        self.assertEqual(len(finished), 1)
 
         self.assertFalse(self.recording_toggle.get_active())
-        mock3.assert_called_once()
+        self.assertEqual(len(started), 1)
 
     def test_cannot_create_duplicate_input_combination(self):
+        origin = self.keyboard_origin
+        config_30 = InputConfig(type=1, code=30, origin_hash=origin)
+        config_31 = InputConfig(type=1, code=31, origin_hash=origin)
+        config_32 = InputConfig(type=1, code=32, origin_hash=origin)
+        expected_30 = InputCombination([config_30])
+        expected_30_31 = InputCombination([config_30, config_31])
+        expected_30_31_32 = InputCombination([config_30, config_31, config_32])
+
         # load a device with more capabilities
         self.controller.load_group("Foo Device 2")
-        gtk_iteration()
+        self.run_until_stable()
 
         # update the combination of the active mapping
-        self.controller.start_key_recording()
-        push_events(
-            fixtures.foo_device_2_keyboard,
-            [InputEvent(0, 0, 1, 30, 1), InputEvent(0, 0, 1, 30, 0)],
-        )
-        self.throttle(60)
+        combination = self.record_combination(fixtures.foo_device_2_keyboard, [30])
 
         # if this fails with <InputCombination (1, 5, 1)>: this is the initial
         # mapping or something, so it was never overwritten.
-        origin = fixtures.foo_device_2_keyboard.get_device_hash()
-        self.assertEqual(
-            self.data_manager.active_mapping.input_combination,
-            InputCombination([InputConfig(type=1, code=30, origin_hash=origin)]),
-        )
+        self.assertEqual(combination, expected_30)
 
         # create a new mapping
         self.controller.create_mapping()
-        gtk_iteration()
+        self.run_until_stable()
         self.assertEqual(
             self.data_manager.active_mapping.input_combination,
-            InputCombination.empty_combination(),
+            self.empty_combination,
         )
 
         # try to record the same combination
-        self.controller.start_key_recording()
-        push_events(
-            fixtures.foo_device_2_keyboard,
-            [InputEvent(0, 0, 1, 30, 1), InputEvent(0, 0, 1, 30, 0)],
-        )
-        self.throttle(60)
+        combination = self.record_combination(fixtures.foo_device_2_keyboard, [30])
         # should still be the empty mapping
-        self.assertEqual(
-            self.data_manager.active_mapping.input_combination,
-            InputCombination.empty_combination(),
-        )
+        self.assertEqual(combination, self.empty_combination)
 
         # try to record a different combination
         self.controller.start_key_recording()
-        push_events(fixtures.foo_device_2_keyboard, [InputEvent(0, 0, 1, 30, 1)])
+        push_event(fixtures.foo_device_2_keyboard, InputEvent(0, 0, 1, 30, 1))
         self.throttle(60)
         # nothing changed yet, as we got the duplicate combination
         self.assertEqual(
             self.data_manager.active_mapping.input_combination,
-            InputCombination.empty_combination(),
+            self.empty_combination,
+        )
+        self.push_and_wait(
+            fixtures.foo_device_2_keyboard,
+            [InputEvent(0, 0, 1, 31, 1)],
+            MessageType.combination_recorded,
         )
-        push_events(fixtures.foo_device_2_keyboard, [InputEvent(0, 0, 1, 31, 1)])
-        self.throttle(60)
         # now the combination is different
         self.assertEqual(
             self.data_manager.active_mapping.input_combination,
-            InputCombination(
-                [
-                    InputConfig(type=1, code=30, origin_hash=origin),
-                    InputConfig(type=1, code=31, origin_hash=origin),
-                ]
-            ),
+            expected_30_31,
         )
 
         # let's make the combination even longer
-        push_events(fixtures.foo_device_2_keyboard, [InputEvent(0, 0, 1, 32, 1)])
-        self.throttle(60)
+        self.push_and_wait(
+            fixtures.foo_device_2_keyboard,
+            [InputEvent(0, 0, 1, 32, 1)],
+            MessageType.combination_recorded,
+        )
         self.assertEqual(
             self.data_manager.active_mapping.input_combination,
-            InputCombination(
-                [
-                    InputConfig(type=1, code=30, origin_hash=origin),
-                    InputConfig(type=1, code=31, origin_hash=origin),
-                    InputConfig(type=1, code=32, origin_hash=origin),
-                ]
-            ),
+            expected_30_31_32,
         )
 
         # make sure we stop recording by releasing all keys
-        push_events(
+        self.push_and_wait(
             fixtures.foo_device_2_keyboard,
             [
                 InputEvent(0, 0, 1, 31, 0),
                 InputEvent(0, 0, 1, 30, 0),
                 InputEvent(0, 0, 1, 32, 0),
             ],
+            MessageType.recording_finished,
         )
-        self.throttle(60)
 
         # sending a combination update now should not do anything
         self.message_broker.publish(
@@ -842,28 +1029,26 @@ class TestGui(GuiTestBase):
         gtk_iteration()
         self.assertEqual(
             self.data_manager.active_mapping.input_combination,
-            InputCombination(
-                [
-                    InputConfig(type=1, code=30, origin_hash=origin),
-                    InputConfig(type=1, code=31, origin_hash=origin),
-                    InputConfig(type=1, code=32, origin_hash=origin),
-                ]
-            ),
+            expected_30_31_32,
         )
 
     def test_create_simple_mapping(self):
+        origin = self.keyboard_origin
+        expected_30 = InputCombination(
+            [InputConfig(type=1, code=30, origin_hash=origin)]
+        )
+
         self.click_on_group("Foo Device 2")
         # 1. create a mapping
-        self.create_mapping_btn.clicked()
-        gtk_iteration()
+        self.click(self.create_mapping_btn)
 
         self.assertEqual(
             self.selection_label_listbox.get_selected_row().combination,
-            InputCombination.empty_combination(),
+            self.empty_combination,
         )
         self.assertEqual(
             self.data_manager.active_mapping.input_combination,
-            InputCombination.empty_combination(),
+            self.empty_combination,
         )
         self.assertEqual(
             self.selection_label_listbox.get_selected_row().name, "Empty Mapping"
@@ -877,27 +1062,31 @@ class TestGui(GuiTestBase):
         # 2. record a combination for that mapping
         self.recording_toggle.set_active(True)
         gtk_iteration()
-        push_events(fixtures.foo_device_2_keyboard, [InputEvent(0, 0, 1, 30, 1)])
-        self.throttle(60)
-        push_events(fixtures.foo_device_2_keyboard, [InputEvent(0, 0, 1, 30, 0)])
-        self.throttle(60)
+        self.push_and_wait(
+            fixtures.foo_device_2_keyboard,
+            [InputEvent(0, 0, 1, 30, 1)],
+            MessageType.combination_recorded,
+        )
+        self.push_and_wait(
+            fixtures.foo_device_2_keyboard,
+            [InputEvent(0, 0, 1, 30, 0)],
+            MessageType.recording_finished,
+        )
 
         # check the input_combination
-        origin = fixtures.foo_device_2_keyboard.get_device_hash()
         self.assertEqual(
             self.selection_label_listbox.get_selected_row().combination,
-            InputCombination([InputConfig(type=1, code=30, origin_hash=origin)]),
+            expected_30,
         )
         self.assertEqual(
             self.data_manager.active_mapping.input_combination,
-            InputCombination([InputConfig(type=1, code=30, origin_hash=origin)]),
+            expected_30,
         )
         self.assertEqual(self.selection_label_listbox.get_selected_row().name, "a")
         self.assertIsNone(self.data_manager.active_mapping.name)
 
         # 3. set the output symbol
-        self.code_editor.get_buffer().set_text("Shift_L")
-        gtk_iteration()
+        self.set_code_input("Shift_L")
 
         # the mapping and preset should be valid by now
         self.assertTrue(self.data_manager.active_mapping.is_valid())
@@ -906,9 +1095,7 @@ class TestGui(GuiTestBase):
         self.assertEqual(
             self.data_manager.active_mapping,
             Mapping(
-                input_combination=InputCombination(
-                    [InputConfig(type=1, code=30, origin_hash=origin)]
-                ),
+                input_combination=expected_30,
                 output_symbol="Shift_L",
                 target_uinput="keyboard",
             ),
@@ -921,7 +1108,7 @@ class TestGui(GuiTestBase):
         )
         self.assertEqual(
             self.selection_label_listbox.get_selected_row().combination,
-            InputCombination([InputConfig(type=1, code=30, origin_hash=origin)]),
+            expected_30,
         )
 
         # 4. update target
@@ -930,9 +1117,7 @@ class TestGui(GuiTestBase):
         self.assertEqual(
             self.data_manager.active_mapping,
             Mapping(
-                input_combination=InputCombination(
-                    [InputConfig(type=1, code=30, origin_hash=origin)]
-                ),
+                input_combination=expected_30,
                 output_symbol="Shift_L",
                 target_uinput="keyboard + mouse",
             ),
@@ -946,7 +1131,7 @@ class TestGui(GuiTestBase):
     def test_hat_switch(self):
         # load a device with more capabilities
         self.controller.load_group("Foo Device 2")
-        gtk_iteration()
+        self.run_until_stable()
 
         # it should be possible to add all of them
         ev_1 = InputEvent.abs(evdev.ecodes.ABS_HAT0X, -1)
@@ -957,17 +1142,18 @@ class TestGui(GuiTestBase):
         def add_mapping(event, symbol) -> InputCombination:
             """adds mapping and returns the expected input combination"""
             self.controller.create_mapping()
-            gtk_iteration()
+            self.run_until_stable()
             self.controller.start_key_recording()
-            push_events(fixtures.foo_device_2_gamepad, [event, event.modify(value=0)])
-            self.throttle(60)
-            gtk_iteration()
-            self.code_editor.get_buffer().set_text(symbol)
-            gtk_iteration()
+            self.push_and_wait(
+                fixtures.foo_device_2_gamepad,
+                [event, event.modify(value=0)],
+                MessageType.recording_finished,
+            )
+            self.set_code_input(symbol)
             return InputCombination(
                 [
                     InputConfig.from_input_event(event).modify(
-                        origin_hash=fixtures.foo_device_2_gamepad.get_device_hash()
+                        origin_hash=self.gamepad_origin
                     )
                 ]
             )
@@ -1008,29 +1194,35 @@ class TestGui(GuiTestBase):
 
         # load a device with more capabilities
         self.controller.load_group("Foo Device 2")
-        gtk_iteration()
+        self.run_until_stable()
 
         # it should be possible to write a combination
         ev_1 = InputEvent.key(
             evdev.ecodes.KEY_A,
             1,
-            origin_hash=fixtures.foo_device_2_keyboard.get_device_hash(),
+            origin_hash=self.keyboard_origin,
         )
         ev_2 = InputEvent.abs(
             evdev.ecodes.ABS_HAT0X,
             1,
-            origin_hash=fixtures.foo_device_2_gamepad.get_device_hash(),
+            origin_hash=self.gamepad_origin,
         )
         ev_3 = InputEvent.key(
             evdev.ecodes.KEY_C,
             1,
-            origin_hash=fixtures.foo_device_2_keyboard.get_device_hash(),
+            origin_hash=self.keyboard_origin,
         )
         ev_4 = InputEvent.abs(
             evdev.ecodes.ABS_HAT0X,
             -1,
-            origin_hash=fixtures.foo_device_2_gamepad.get_device_hash(),
+            origin_hash=self.gamepad_origin,
         )
+        # the configs carry the origin_hash of the events
+        configs = {
+            event: InputConfig.from_input_event(event)
+            for event in (ev_1, ev_2, ev_3, ev_4)
+        }
+
         combination_1 = (ev_1, ev_2, ev_3)
         combination_2 = (ev_2, ev_1, ev_3)
 
@@ -1043,205 +1235,89 @@ class TestGui(GuiTestBase):
         combination_6 = (ev_3, ev_1, ev_2)
 
         def get_combination(combi: Iterable[InputEvent]) -> InputCombination:
-            """Create an InputCombination from a list of events.
+            return InputCombination([configs[event] for event in combi])
 
-            Ensures the origin_hash is set correctly.
-            """
-            configs = []
-            for event in combi:
-                config = InputConfig.from_input_event(event)
-                configs.append(config)
-            return InputCombination(configs)
+        fixtures_by_type = {
+            EV_KEY: fixtures.foo_device_2_keyboard,
+            EV_ABS: fixtures.foo_device_2_gamepad,
+            EV_REL: fixtures.foo_device_2_mouse,
+        }
 
         def add_mapping(combi: Iterable[InputEvent], symbol):
             logger.info("add_mapping %s", combi)
             self.controller.create_mapping()
-            gtk_iteration()
+            self.run_until_stable()
             self.controller.start_key_recording()
-            for event in combi:
-                if event.type == EV_KEY:
-                    push_event(fixtures.foo_device_2_keyboard, event)
-                if event.type == EV_ABS:
-                    push_event(fixtures.foo_device_2_gamepad, event)
-                if event.type == EV_REL:
-                    push_event(fixtures.foo_device_2_mouse, event)
-
-                # avoid race condition if we switch fixture in push_event. The order
-                # of events needs to be correct.
-                self.throttle(20)
-
-            for event in combi:
-                if event.type == EV_KEY:
-                    push_event(fixtures.foo_device_2_keyboard, event.modify(value=0))
-                if event.type == EV_ABS:
-                    push_event(fixtures.foo_device_2_gamepad, event.modify(value=0))
-                if event.type == EV_REL:
-                    pass
-
-            self.throttle(60)
-            gtk_iteration()
-            self.code_editor.get_buffer().set_text(symbol)
-            gtk_iteration()
-
-        add_mapping(combination_1, "a")
-
-        self.assertEqual(
-            self.data_manager.active_preset.get_mapping(
-                get_combination(combination_1)
-            ).output_symbol,
-            "a",
-        )
-        self.assertEqual(
-            self.data_manager.active_preset.get_mapping(
-                get_combination(combination_2)
-            ).output_symbol,
-            "a",
-        )
-        self.assertIsNone(
-            self.data_manager.active_preset.get_mapping(get_combination(combination_3))
-        )
-        self.assertIsNone(
-            self.data_manager.active_preset.get_mapping(get_combination(combination_4))
-        )
-        self.assertIsNone(
-            self.data_manager.active_preset.get_mapping(get_combination(combination_5))
-        )
-        self.assertIsNone(
-            self.data_manager.active_preset.get_mapping(get_combination(combination_6))
-        )
-
-        # it won't write the same combination again, even if the
-        # first two events are in a different order
-        add_mapping(combination_2, "b")
-        self.assertEqual(
-            self.data_manager.active_preset.get_mapping(
-                get_combination(combination_1)
-            ).output_symbol,
-            "a",
-        )
-        self.assertEqual(
-            self.data_manager.active_preset.get_mapping(
-                get_combination(combination_2)
-            ).output_symbol,
-            "a",
-        )
-        self.assertIsNone(
-            self.data_manager.active_preset.get_mapping(get_combination(combination_3))
-        )
-        self.assertIsNone(
-            self.data_manager.active_preset.get_mapping(get_combination(combination_4))
-        )
-        self.assertIsNone(
-            self.data_manager.active_preset.get_mapping(get_combination(combination_5))
-        )
-        self.assertIsNone(
-            self.data_manager.active_preset.get_mapping(get_combination(combination_6))
-        )
+            for type_, group in groupby(combi, key=lambda event: event.type):
+                # avoid race condition if we switch fixture in push_events. The order
+                # of events needs to be correct, so wait until they are recorded.
+                events = list(group)
+                self.push_and_wait(
+                    fixtures_by_type[type_],
+                    events,
+                    MessageType.combination_recorded,
+                    count=len(events),
+                )
+
+            finished = []
+            self.message_broker.subscribe(
+                MessageType.recording_finished, finished.append
+            )
+            try:
+                for type_, group in groupby(combi, key=lambda event: event.type):
+                    if type_ == EV_REL:
+                        continue
 
-        add_mapping(combination_3, "c")
-        self.assertEqual(
-            self.data_manager.active_preset.get_mapping(
-                get_combination(combination_1)
-            ).output_symbol,
-            "a",
-        )
-        self.assertEqual(
-            self.data_manager.active_preset.get_mapping(
-                get_combination(combination_2)
-            ).output_symbol,
-            "a",
-        )
-        self.assertEqual(
-            self.data_manager.active_preset.get_mapping(
-                get_combination(combination_3)
-            ).output_symbol,
-            "c",
-        )
-        self.assertEqual(
-            self.data_manager.active_preset.get_mapping(
-                get_combination(combination_4)
-            ).output_symbol,
-            "c",
-        )
-        self.assertIsNone(
-            self.data_manager.active_preset.get_mapping(get_combination(combination_5))
-        )
-        self.assertIsNone(
-            self.data_manager.active_preset.get_mapping(get_combination(combination_6))
-        )
+                    push_events(
+                        fixtures_by_type[type_],
+                        [event.modify(value=0) for event in group],
+                    )
 
-        # same as with combination_2, the existing combination_3 blocks
-        # combination_4 because they have the same keys and end in the
-        # same key.
-        add_mapping(combination_4, "d")
-        self.assertEqual(
-            self.data_manager.active_preset.get_mapping(
-                get_combination(combination_1)
-            ).output_symbol,
-            "a",
-        )
-        self.assertEqual(
-            self.data_manager.active_preset.get_mapping(
-                get_combination(combination_2)
-            ).output_symbol,
-            "a",
-        )
-        self.assertEqual(
-            self.data_manager.active_preset.get_mapping(
-                get_combination(combination_3)
-            ).output_symbol,
-            "c",
-        )
-        self.assertEqual(
-            self.data_manager.active_preset.get_mapping(
-                get_combination(combination_4)
-            ).output_symbol,
-            "c",
-        )
-        self.assertIsNone(
-            self.data_manager.active_preset.get_mapping(get_combination(combination_5))
-        )
-        self.assertIsNone(
-            self.data_manager.active_preset.get_mapping(get_combination(combination_6))
-        )
+                self.assertTrue(
+                    wait_until(lambda: len(finished) > 0),
+                    "the recording didn't finish",
+                )
+            finally:
+                self.message_broker.unsubscribe(finished.append)
+            self.set_code_input(symbol)
+
+        combinations = [
+            get_combination(combination)
+            for combination in (
+                combination_1,
+                combination_2,
+                combination_3,
+                combination_4,
+                combination_5,
+                combination_6,
+            )
+        ]
 
-        add_mapping(combination_5, "e")
-        self.assertEqual(
-            self.data_manager.active_preset.get_mapping(
-                get_combination(combination_1)
-            ).output_symbol,
-            "a",
-        )
-        self.assertEqual(
-            self.data_manager.active_preset.get_mapping(
-                get_combination(combination_2)
-            ).output_symbol,
-            "a",
-        )
-        self.assertEqual(
-            self.data_manager.active_preset.get_mapping(
-                get_combination(combination_3)
-            ).output_symbol,
-            "c",
-        )
-        self.assertEqual(
-            self.data_manager.active_preset.get_mapping(
-                get_combination(combination_4)
-            ).output_symbol,
-            "c",
-        )
-        self.assertEqual(
-            self.data_manager.active_preset.get_mapping(
-                get_combination(combination_5)
-            ).output_symbol,
-            "e",
-        )
-        self.assertEqual(
-            self.data_manager.active_preset.get_mapping(
-                get_combination(combination_6)
-            ).output_symbol,
-            "e",
-        )
+        def check(expected: List[Optional[str]], msg: str):
+            """Compare the output_symbol of the mapping of each combination."""
+            for combination, output_symbol in zip(combinations, expected):
+                mapping = self.data_manager.active_preset.get_mapping(combination)
+                if output_symbol is None:
+                    self.assertIsNone(mapping, msg)
+                else:
+                    self.assertEqual(mapping.output_symbol, output_symbol, msg)
+
+        # each step depends on the mappings added by the previous ones
+        steps = [
+            (combination_1, "a", ["a", "a", None, None, None, None]),
+            # it won't write the same combination again, even if the
+            # first two events are in a different order
+            (combination_2, "b", ["a", "a", None, None, None, None]),
+            (combination_3, "c", ["a", "a", "c", "c", None, None]),
+            # same as with combination_2, the existing combination_3 blocks
+            # combination_4 because they have the same keys and end in the
+            # same key.
+            (combination_4, "d", ["a", "a", "c", "c", None, None]),
+            (combination_5, "e", ["a", "a", "c", "c", "e", "e"]),
+        ]
+        for step, (combination, symbol, expected) in enumerate(steps, start=1):
+            add_mapping(combination, symbol)
+            check(expected, msg=f"step {step} {symbol}")
 
         error_icon = self.user_interface.get("error_status_icon")
         warning_icon = self.user_interface.get("warning_status_icon")
@@ -1257,24 +1333,23 @@ class TestGui(GuiTestBase):
         self.assertEqual(len(self.selection_label_listbox.get_children()), 1)
         self.assertEqual(len(self.data_manager.active_preset), 1)
 
-        self.create_mapping_btn.clicked()
-        gtk_iteration()
+        self.click(self.create_mapping_btn)
         self.assertEqual(
             self.selection_label_listbox.get_selected_row().combination,
-            InputCombination.empty_combination(),
+            self.empty_combination,
         )
         self.assertEqual(len(self.selection_label_listbox.get_children()), 2)
         self.assertEqual(len(self.data_manager.active_preset), 2)
 
-        self.create_mapping_btn.clicked()
-        gtk_iteration()
-        self.assertEqual(len(self.selection_label_listbox.get_children()), 2)
+        # a second empty mapping can't be created. The button has been tested above
+        # already, so ask the controller directly, which is synchronous.
+        self.assertFalse(self.controller.create_mapping())
         self.assertEqual(len(self.data_manager.active_preset), 2)
 
     def test_selection_labels_sort_alphabetically(self):
         self.controller.load_preset("preset1")
         # contains two mappings (1,1,1 -> b) and (1,2,1 -> a)
-        gtk_iteration()
+        self.run_until_stable()
         # we expect (1,2,1 -> a) to be selected because "1" < "Escape"
         self.assertEqual(self.data_manager.active_mapping.output_symbol, "a")
         self.assertIs(
@@ -1289,21 +1364,21 @@ class TestGui(GuiTestBase):
                 InputCombination([InputConfig(type=EV_KEY, code=KEY_Q)])
             )
         )
-        gtk_iteration()
         self.message_broker.signal(MessageType.recording_finished)
-        gtk_iteration()
         # the combination and the order changed "Escape" < "q"
-        self.assertEqual(self.data_manager.active_mapping.output_symbol, "a")
-        self.assertIs(
-            self.selection_label_listbox.get_row_at_index(1),
-            self.selection_label_listbox.get_selected_row(),
+        self.assertTrue(
+            wait_until(
+                lambda: self.selection_label_listbox.get_row_at_index(1)
+                is self.selection_label_listbox.get_selected_row()
+            )
         )
+        self.assertEqual(self.data_manager.active_mapping.output_symbol, "a")
 
     def test_selection_labels_sort_empty_mapping_to_the_bottom(self):
         # make sure we have a mapping which would sort to the bottom only
         # considering alphanumeric sorting: "q" > "Empty Mapping"
         self.controller.load_preset("preset1")
-        gtk_iteration()
+        self.run_until_stable()
         self.recording_toggle.set_active(True)
         gtk_iteration()
         self.message_broker.publish(
@@ -1311,21 +1386,20 @@ class TestGui(GuiTestBase):
                 InputCombination([InputConfig(type=EV_KEY, code=KEY_Q)])
             )
         )
-        gtk_iteration()
         self.message_broker.signal(MessageType.recording_finished)
         gtk_iteration()
 
         self.controller.create_mapping()
-        gtk_iteration()
+        self.run_until_stable()
         row: MappingSelectionLabel = self.selection_label_listbox.get_selected_row()
-        self.assertEqual(row.combination, InputCombination.empty_combination())
+        self.assertEqual(row.combination, self.empty_combination)
         self.assertEqual(row.label.get_text(), "Empty Mapping")
         self.assertIs(self.selection_label_listbox.get_row_at_index(2), row)
 
     def test_select_mapping(self):
         self.controller.load_preset("preset1")
         # contains two mappings (1,1,1 -> b) and (1,2,1 -> a)
-        gtk_iteration()
+        self.run_until_stable()
         # we expect (1,2,1 -> a) to be selected because "1" < "Escape"
         self.assertEqual(self.data_manager.active_mapping.output_symbol, "a")
 
@@ -1337,21 +1411,21 @@ class TestGui(GuiTestBase):
 
     def test_selection_label_uses_name_if_available(self):
         self.controller.load_preset("preset1")
-        gtk_iteration()
+        self.run_until_stable()
         row: MappingSelectionLabel = self.selection_label_listbox.get_selected_row()
         self.assertEqual(row.label.get_text(), "1")
         self.assertIs(row, self.selection_label_listbox.get_row_at_index(0))
 
         self.controller.update_mapping(name="foo")
-        gtk_iteration()
+        self.run_until_stable()
         self.assertEqual(row.label.get_text(), "foo")
         self.assertIs(row, self.selection_label_listbox.get_row_at_index(1))
 
         # Empty Mapping still sorts to the bottom
         self.controller.create_mapping()
-        gtk_iteration()
+        self.run_until_stable()
         row = self.selection_label_listbox.get_selected_row()
-        self.assertEqual(row.combination, InputCombination.empty_combination())
+        self.assertEqual(row.combination, self.empty_combination)
         self.assertEqual(row.label.get_text(), "Empty Mapping")
         self.assertIs(self.selection_label_listbox.get_row_at_index(2), row)
 
@@ -1359,7 +1433,7 @@ class TestGui(GuiTestBase):
         """If someone chooses to name a mapping "Empty Mapping"
         it is not sorted to the bottom"""
         self.controller.load_preset("preset1")
-        gtk_iteration()
+        self.run_until_stable()
 
         self.controller.update_mapping(name="Empty Mapping")
         self.throttle(20)  # sorting seems to take a bit
@@ -1389,18 +1463,17 @@ class TestGui(GuiTestBase):
         self.assertIsNone(self.data_manager.active_mapping.name)
         self.assertEqual(
             self.data_manager.active_mapping.input_combination,
-            InputCombination.empty_combination(),
+            self.empty_combination,
         )
 
     def test_remove_mapping(self):
         self.controller.load_preset("preset1")
-        gtk_iteration()
+        self.run_until_stable()
         self.assertEqual(len(self.data_manager.active_preset), 2)
         self.assertEqual(len(self.selection_label_listbox.get_children()), 2)
 
         with PatchedConfirmDelete(self.user_interface):
-            self.delete_mapping_btn.clicked()
-            gtk_iteration()
+            self.click(self.delete_mapping_btn)
 
         self.assertEqual(len(self.data_manager.active_preset), 1)
         self.assertEqual(len(self.selection_label_listbox.get_children()), 1)
@@ -1408,22 +1481,19 @@ class TestGui(GuiTestBase):
     def test_problematic_combination(self):
         # load a device with more capabilities
         self.controller.load_group("Foo Device 2")
-        gtk_iteration()
+        self.run_until_stable()
 
         def add_mapping(combi: Iterable[Tuple[int, int, int]], symbol):
             combi = [InputEvent(0, 0, *t) for t in combi]
             self.controller.create_mapping()
-            gtk_iteration()
+            self.run_until_stable()
             self.controller.start_key_recording()
-            push_events(fixtures.foo_device_2_keyboard, combi)
-            push_events(
+            self.push_and_wait(
                 fixtures.foo_device_2_keyboard,
-                [event.modify(value=0) for event in combi],
+                combi + [event.modify(value=0) for event in combi],
+                MessageType.recording_finished,
             )
-            self.throttle(60)
-            gtk_iteration()
-            self.code_editor.get_buffer().set_text(symbol)
-            gtk_iteration()
+            self.set_code_input(symbol)
 
         combination = [(EV_KEY, KEY_LEFTSHIFT, 1), (EV_KEY, 82, 1)]
 
@@ -1440,8 +1510,7 @@ class TestGui(GuiTestBase):
     def test_rename_and_save(self):
         # only a basic test, TestController and TestDataManager go more in detail
         self.rename_input.set_text("foo")
-        self.rename_btn.clicked()
-        gtk_iteration()
+        self.click(self.rename_btn)
 
         preset_path = f"{CONFIG_PATH}/presets/Foo Device/foo.json"
         self.assertTrue(os.path.exists(preset_path))
@@ -1452,14 +1521,12 @@ class TestGui(GuiTestBase):
             raise PermissionError
 
         with patch.object(self.data_manager.active_preset, "save", save):
-            self.code_editor.get_buffer().set_text("f")
-            gtk_iteration()
+            self.set_code_input("f")
         status = self.get_status_text()
         self.assertIn("Permission denied", status)
 
         with PatchedConfirmDelete(self.user_interface):
-            self.delete_preset_btn.clicked()
-            gtk_iteration()
+            self.click(self.delete_preset_btn)
         self.assertFalse(os.path.exists(preset_path))
 
     def test_check_for_unknown_symbols(self):
@@ -1470,13 +1537,13 @@ class TestGui(GuiTestBase):
         self.controller.load_preset("preset1")
         self.throttle(20)
         self.controller.load_mapping(InputCombination([InputConfig(type=1, code=1)]))
-        gtk_iteration()
+        self.run_until_stable()
         self.controller.update_mapping(output_symbol="foo")
-        gtk_iteration()
+        self.run_until_stable()
         self.controller.load_mapping(InputCombination([InputConfig(type=1, code=2)]))
-        gtk_iteration()
+        self.run_until_stable()
         self.controller.update_mapping(output_symbol="qux")
-        gtk_iteration()
+        self.run_until_stable()
 
         tooltip = status.get_tooltip_text().lower()
         self.assertIn("qux", tooltip)
@@ -1490,16 +1557,16 @@ class TestGui(GuiTestBase):
             self.assertIn("foo", content)
 
         self.controller.update_mapping(output_symbol="a")
-        gtk_iteration()
+        self.run_until_stable()
         tooltip = status.get_tooltip_text().lower()
         self.assertIn("foo", tooltip)
         self.assertTrue(error_icon.get_visible())
         self.assertFalse(warning_icon.get_visible())
 
         self.controller.load_mapping(InputCombination([InputConfig(type=1, code=1)]))
-        gtk_iteration()
+        self.run_until_stable()
         self.controller.update_mapping(output_symbol="b")
-        gtk_iteration()
+        self.run_until_stable()
         tooltip = status.get_tooltip_text()
         self.assertIsNone(tooltip)
         self.assertFalse(error_icon.get_visible())
@@ -1584,31 +1651,13 @@ class TestGui(GuiTestBase):
         FlowBoxTestUtils.set_active(self.preset_selection, "preset1")
         gtk_iteration()
 
-        mappings = {
-            row.combination for row in self.selection_label_listbox.get_children()
-        }
-        self.assertEqual(
-            mappings,
-            {
-                InputCombination([InputConfig(type=1, code=1)]),
-                InputCombination([InputConfig(type=1, code=2)]),
-            },
-        )
+        self.assertEqual(self.get_row_combinations(), PRESET1_COMBINATIONS)
         self.assertFalse(self.autoload_toggle.get_active())
 
         FlowBoxTestUtils.set_active(self.preset_selection, "preset2")
         gtk_iteration()
 
-        mappings = {
-            row.combination for row in self.selection_label_listbox.get_children()
-        }
-        self.assertEqual(
-            mappings,
-            {
-                InputCombination([InputConfig(type=1, code=3)]),
-                InputCombination([InputConfig(type=1, code=4)]),
-            },
-        )
+        self.assertEqual(self.get_row_combinations(), PRESET2_COMBINATIONS)
         self.assertTrue(self.autoload_toggle.get_active())
 
     def test_copy_preset(self):
@@ -1622,8 +1671,7 @@ class TestGui(GuiTestBase):
             FlowBoxTestUtils.get_active_entry(self.preset_selection).name, "preset3"
         )
 
-        self.copy_preset_btn.clicked()
-        gtk_iteration()
+        self.click(self.copy_preset_btn)
         entries = {*FlowBoxTestUtils.get_child_names(self.preset_selection)}
         self.assertEqual(entries, {"preset1", "preset2", "preset3", "preset3 copy"})
         self.assertEqual(
@@ -1631,8 +1679,7 @@ class TestGui(GuiTestBase):
             "preset3 copy",
         )
 
-        self.copy_preset_btn.clicked()
-        gtk_iteration()
+        self.click(self.copy_preset_btn)
 
         entries = {*FlowBoxTestUtils.get_child_names(self.preset_selection)}
         self.assertEqual(
@@ -1642,18 +1689,13 @@ class TestGui(GuiTestBase):
     def test_wont_start(self):
         def wait():
             """Wait for the injector process to finish doing stuff."""
-            for _ in range(10):
-                time.sleep(0.1)
-                gtk_iteration()
-                if "Starting" not in self.get_status_text():
-                    return
+            wait_until(lambda: "Starting" not in self.get_status_text())
 
         error_icon = self.user_interface.get("error_status_icon")
         self.controller.load_group("Bar Device")
 
         # empty
-        self.start_injector_btn.clicked()
-        gtk_iteration()
+        self.click(self.start_injector_btn)
         wait()
         text = self.get_status_text()
         self.assertIn("add mappings", text)
@@ -1662,13 +1704,12 @@ class TestGui(GuiTestBase):
 
         # device grabbing fails
         self.controller.load_group("Foo Device 2")
-        gtk_iteration()
+        self.run_until_stable()
 
         for i in range(2):
             # just pressing apply again will overwrite the previous error
             self.grab_fails = True
-            self.start_injector_btn.clicked()
-            gtk_iteration()
+            self.click(self.start_injector_btn)
 
             text = self.get_status_text()
             # it takes a little bit of time
@@ -1685,49 +1726,41 @@ class TestGui(GuiTestBase):
         # this time work properly
 
         self.grab_fails = False
-        self.start_injector_btn.clicked()
-        gtk_iteration()
+        self.click(self.start_injector_btn)
         text = self.get_status_text()
         self.assertIn("Starting injection", text)
         self.assertFalse(error_icon.get_visible())
         wait()
         text = self.get_status_text()
         self.assertIn("Applied", text)
-        text = self.get_status_text()
         self.assertNotIn("CTRL + DEL", text)  # only shown if btn_left mapped
         self.assertFalse(error_icon.get_visible())
         self.assertEqual(self.daemon.get_state("Foo Device 2"), InjectorState.RUNNING)
 
     def test_start_with_btn_left(self):
         self.controller.load_group("Foo Device 2")
-        gtk_iteration()
+        self.run_until_stable()
 
         self.controller.create_mapping()
-        gtk_iteration()
+        self.run_until_stable()
         self.controller.update_mapping(
             input_combination=InputCombination([InputConfig.btn_left()]),
             output_symbol="a",
         )
-        gtk_iteration()
+        self.run_until_stable()
 
         def wait():
             """Wait for the injector process to finish doing stuff."""
-            for _ in range(10):
-                time.sleep(0.1)
-                gtk_iteration()
-                if "Starting" not in self.get_status_text():
-                    return
+            wait_until(lambda: "Starting" not in self.get_status_text())
 
         # first apply, shows btn_left warning
-        self.start_injector_btn.clicked()
-        gtk_iteration()
+        self.click(self.start_injector_btn)
         text = self.get_status_text()
         self.assertIn("click", text)
         self.assertEqual(self.daemon.get_state("Foo Device 2"), InjectorState.UNKNOWN)
 
         # second apply, overwrites
-        self.start_injector_btn.clicked()
-        gtk_iteration()
+        self.click(self.start_injector_btn)
         wait()
         self.assertEqual(self.daemon.get_state("Foo Device 2"), InjectorState.RUNNING)
         text = self.get_status_text()
@@ -1744,17 +1777,12 @@ class TestGui(GuiTestBase):
         gtk_iteration()
         self.assertTrue(self.recording_toggle.get_active())
         self.controller.stop_key_recording()
-        gtk_iteration()
+        self.run_until_stable()
         self.assertFalse(self.recording_toggle.get_active())
 
-        self.start_injector_btn.clicked()
-        gtk_iteration()
+        self.click(self.start_injector_btn)
         # wait for the injector to start
-        for _ in range(10):
-            time.sleep(0.1)
-            gtk_iteration()
-            if "Starting" not in self.get_status_text():
-                break
+        wait_until(lambda: "Starting" not in self.get_status_text())
 
         self.assertEqual(self.data_manager.get_state(), InjectorState.RUNNING)
 
@@ -1775,18 +1803,13 @@ class TestGui(GuiTestBase):
 
         with spy(self.daemon, "set_config_dir") as spy1:
             with spy(self.daemon, "start_injecting") as spy2:
-                self.start_injector_btn.clicked()
-                gtk_iteration()
+                self.click(self.start_injector_btn)
                 # correctly uses group.key, not group.name
                 spy2.assert_called_once_with("Foo Device 2", "preset3")
 
             spy1.assert_called_once_with(get_config_path())
 
-        for _ in range(10):
-            time.sleep(0.1)
-            gtk_iteration()
-            if self.data_manager.get_state() == InjectorState.RUNNING:
-                break
+        wait_until(lambda: self.data_manager.get_state() == InjectorState.RUNNING)
 
         # fail here so we don't block forever
         self.assertEqual(self.data_manager.get_state(), InjectorState.RUNNING)
@@ -1797,7 +1820,7 @@ class TestGui(GuiTestBase):
         # (reader-service and injector) reading the same pipe which can block this test
         # indefinitely
         self.controller.load_group("Foo Device")
-        gtk_iteration()
+        self.run_until_stable()
 
         push_events(
             fixtures.foo_device_2_keyboard,
@@ -1807,19 +1830,23 @@ class TestGui(GuiTestBase):
             ],
         )
 
-        event = uinput_write_history_pipe[0].recv()
+        # poll with a timeout, so that this fails instead of blocking forever
+        pipe = uinput_write_history_pipe[0]
+        self.assertTrue(pipe.poll(1))
+        event = pipe.recv()
         self.assertEqual(event.type, evdev.events.EV_KEY)
         self.assertEqual(event.code, KEY_A)
         self.assertEqual(event.value, 1)
 
-        event = uinput_write_history_pipe[0].recv()
+        self.assertTrue(pipe.poll(1))
+        event = pipe.recv()
         self.assertEqual(event.type, evdev.events.EV_KEY)
         self.assertEqual(event.code, KEY_A)
         self.assertEqual(event.value, 0)
 
         # the input-remapper device will not be shown
         self.controller.refresh_groups()
-        gtk_iteration()
+        self.run_until_stable()
         for child in self.device_selection.get_children():
             device_group_entry = child.get_children()[0]
             self.assertNotIn("input-remapper", device_group_entry.name)
@@ -1828,21 +1855,16 @@ class TestGui(GuiTestBase):
         reset_global_uinputs_for_service()
 
         self.controller.load_group("Foo Device 2")
-        self.start_injector_btn.clicked()
-        gtk_iteration()
+        self.click(self.start_injector_btn)
 
-        for _ in range(10):
-            time.sleep(0.1)
-            gtk_iteration()
-            if self.data_manager.get_state() == InjectorState.RUNNING:
-                break
+        wait_until(lambda: self.data_manager.get_state() == InjectorState.RUNNING)
 
         # fail here so we don't block forever
         self.assertEqual(self.data_manager.get_state(), InjectorState.RUNNING)
 
         # stupid fixture workaround
         self.controller.load_group("Foo Device")
-        gtk_iteration()
+        self.run_until_stable()
 
         pipe = uinput_write_history_pipe[0]
         self.assertFalse(pipe.poll())
@@ -1855,20 +1877,20 @@ class TestGui(GuiTestBase):
             ],
         )
 
-        time.sleep(0.2)
-        self.assertTrue(pipe.poll())
-        while pipe.poll():
+        # returns as soon as the injector writes the press and the release
+        for _ in range(2):
+            self.assertTrue(pipe.poll(1))
+            pipe.recv()
+
+        # drain anything else that is written late, until the pipe is quiet
+        while pipe.poll(0.1):
             pipe.recv()
 
         self.controller.load_group("Foo Device 2")
         self.controller.stop_injecting()
-        gtk_iteration()
+        self.run_until_stable()
 
-        for _ in range(10):
-            time.sleep(0.1)
-            gtk_iteration()
-            if self.data_manager.get_state() == InjectorState.STOPPED:
-                break
+        wait_until(lambda: self.data_manager.get_state() == InjectorState.STOPPED)
         self.assertEqual(self.data_manager.get_state(), InjectorState.STOPPED)
 
         push_events(
@@ -1878,24 +1900,25 @@ class TestGui(GuiTestBase):
                 InputEvent.key(5, 0),
             ],
         )
-        time.sleep(0.2)
-        self.assertFalse(pipe.poll())
+        # nothing should arrive, this needs to wait for the whole timeout
+        self.assertFalse(pipe.poll(0.2))
 
     def test_delete_preset(self):
+        # listing the directory shows all presets if an assertion fails
+        device_path = get_preset_path("Foo Device")
+
         # as per test_initial_state we already have preset3 loaded
-        self.assertTrue(os.path.exists(get_preset_path("Foo Device", "preset3")))
+        self.assertIn("preset3.json", os.listdir(device_path))
 
         with PatchedConfirmDelete(self.user_interface, Gtk.ResponseType.CANCEL):
-            self.delete_preset_btn.clicked()
-            gtk_iteration()
-            self.assertTrue(os.path.exists(get_preset_path("Foo Device", "preset3")))
+            self.click(self.delete_preset_btn)
+            self.assertIn("preset3.json", os.listdir(device_path))
             self.assertEqual(self.data_manager.active_preset.name, "preset3")
             self.assertEqual(self.data_manager.active_group.name, "Foo Device")
 
         with PatchedConfirmDelete(self.user_interface):
-            self.delete_preset_btn.clicked()
-            gtk_iteration()
-            self.assertFalse(os.path.exists(get_preset_path("Foo Device", "preset3")))
+            self.click(self.delete_preset_btn)
+            self.assertNotIn("preset3.json", os.listdir(device_path))
             self.assertEqual(self.data_manager.active_preset.name, "preset2")
             self.assertEqual(self.data_manager.active_group.name, "Foo Device")
 
@@ -1918,9 +1941,17 @@ class TestGui(GuiTestBase):
             # 0, [unknown_key, None, "foo"]
         )
 
-        self.controller.refresh_groups()
+        # the reader-service answers asynchronously, and the groups are published
+        # even if they didn't change
+        groups = []
+        self.message_broker.subscribe(MessageType.groups, groups.append)
+        try:
+            self.controller.refresh_groups()
+            self.assertTrue(wait_until(lambda: len(groups) > 0))
+        finally:
+            self.message_broker.unsubscribe(groups.append)
+
         gtk_iteration()
-        self.throttle(200)
         # the gui should not jump to a different preset suddenly
         self.assertEqual(self.data_manager.active_preset.name, "preset1")
 
@@ -1961,10 +1992,10 @@ class TestGui(GuiTestBase):
         self.controller.load_group("Foo Device")
         presets1 = self.data_manager.get_preset_names()
         self.controller.load_group("Foo Device 2")
-        gtk_iteration()
+        self.run_until_stable()
         presets2 = self.data_manager.get_preset_names()
         self.controller.load_group("Bar Device")
-        gtk_iteration()
+        self.run_until_stable()
         presets3 = self.data_manager.get_preset_names()
 
         self.assertEqual(presets1, presets2)
@@ -1975,24 +2006,21 @@ class TestGui(GuiTestBase):
             # as per test_initial_state we already have preset3 loaded
             self.assertEqual(self.data_manager.active_preset.name, "preset3")
 
-            self.delete_preset_btn.clicked()
-            gtk_iteration()
+            self.click(self.delete_preset_btn)
             # the next newest preset should be loaded
             self.assertEqual(self.data_manager.active_preset.name, "preset2")
-            self.delete_preset_btn.clicked()
-            gtk_iteration()
+            self.click(self.delete_preset_btn)
             self.delete_preset_btn.clicked()
             # the ui should be clean
             self.assert_gui_clean()
             device_path = f"{CONFIG_PATH}/presets/{self.data_manager.active_group.name}"
-            self.assertTrue(os.path.exists(f"{device_path}/new preset.json"))
+            self.assertIn("new preset.json", os.listdir(device_path))
 
-            self.delete_preset_btn.clicked()
-            gtk_iteration()
+            self.click(self.delete_preset_btn)
             # deleting an empty preset als doesn't do weird stuff
             self.assert_gui_clean()
             device_path = f"{CONFIG_PATH}/presets/{self.data_manager.active_group.name}"
-            self.assertTrue(os.path.exists(f"{device_path}/new preset.json"))
+            self.assertIn("new preset.json", os.listdir(device_path))
 
     def test_enable_disable_output(self):
         # load a group without any presets
@@ -2004,7 +2032,7 @@ class TestGui(GuiTestBase):
 
         # create a mapping
         self.controller.create_mapping()
-        gtk_iteration()
+        self.run_until_stable()
 
         # should still be disabled
         self.assertEqual(self.get_unfiltered_symbol_input_text(), SET_KEY_FIRST)
@@ -2012,7 +2040,7 @@ class TestGui(GuiTestBase):
 
         # enable it by sending a combination
         self.controller.start_key_recording()
-        gtk_iteration()
+        self.run_until_stable()
         push_events(
             fixtures.bar_device,
             [
@@ -2020,7 +2048,8 @@ class TestGui(GuiTestBase):
                 InputEvent(0, 0, 1, 30, 0),
             ],
         )
-        self.throttle(100)  # give time for the input to arrive
+        # give time for the input to arrive
+        wait_until(lambda: self.output_box.get_sensitive())
 
         self.assertEqual(
             self.get_unfiltered_symbol_input_text(), CodeEditor.placeholder
@@ -2029,28 +2058,19 @@ class TestGui(GuiTestBase):
 
         # disable it by deleting the mapping
         with PatchedConfirmDelete(self.user_interface):
-            self.delete_mapping_btn.clicked()
-            gtk_iteration()
+            self.click(self.delete_mapping_btn)
 
         self.assertEqual(self.get_unfiltered_symbol_input_text(), SET_KEY_FIRST)
         self.assertFalse(self.output_box.get_sensitive())
 
 
-class TestAutocompletion(GuiTestBase):
-    def press_key(self, keyval):
-        event = Gdk.EventKey()
-        event.keyval = keyval
-        self.user_interface.autocompletion.navigate(None, event)
-
-    def get_suggestions(self, autocompletion):
-        return [
-            row.get_children()[0].get_text()
-            for row in autocompletion.list_box.get_children()
-        ]
-
+class TestGetIncomplete(unittest.TestCase):
+    # only needs a Gtk.TextView, not the whole ui
     def test_get_incomplete_parameter(self):
+        text_view = Gtk.TextView()
+
         def test(text, expected):
-            text_view = Gtk.TextView()
+            text_view.get_buffer().set_text("")
             Gtk.TextView.do_insert_at_cursor(text_view, text)
             text_iter = text_view.get_iter_at_location(0, 0)[1]
             text_iter.set_offset(len(text))
@@ -2063,8 +2083,10 @@ class TestAutocompletion(GuiTestBase):
         test("bar + foo", "foo")
 
     def test_get_incomplete_function_name(self):
+        text_view = Gtk.TextView()
+
         def test(text, expected):
-            text_view = Gtk.TextView()
+            text_view.get_buffer().set_text("")
             Gtk.TextView.do_insert_at_cursor(text_view, text)
             text_iter = text_view.get_iter_at_location(0, 0)[1]
             text_iter.set_offset(len(text))
@@ -2078,6 +2100,19 @@ class TestAutocompletion(GuiTestBase):
         test("bar(KEY_A,\nfoo", "foo")
         test("foo", "foo")
 
+
+class TestAutocompletion(GuiTestBase):
+    def press_key(self, keyval):
+        event = Gdk.EventKey()
+        event.keyval = keyval
+        self.user_interface.autocompletion.navigate(None, event)
+
+    def get_suggestions(self, autocompletion):
+        return [
+            row.get_children()[0].get_text()
+            for row in autocompletion.list_box.get_children()
+        ]
+
     def test_autocomplete_names(self):
         autocompletion = self.user_interface.autocompletion
 
@@ -2085,7 +2120,7 @@ class TestAutocompletion(GuiTestBase):
             self.set_focus(self.code_editor)
             self.code_editor.get_buffer().set_text("")
             Gtk.TextView.do_insert_at_cursor(self.code_editor, text)
-            self.throttle(200)
+            self.flush_debounce()
             text_iter = self.code_editor.get_iter_at_location(0, 0)[1]
             text_iter.set_offset(len(text))
 
@@ -2099,7 +2134,7 @@ class TestAutocompletion(GuiTestBase):
 
     def test_autocomplete_key(self):
         self.controller.update_mapping(output_symbol="")
-        gtk_iteration()
+        self.run_until_stable()
 
         self.set_focus(self.code_editor)
         self.code_editor.get_buffer().set_text("")
@@ -2121,16 +2156,14 @@ class TestAutocompletion(GuiTestBase):
         )
 
         Gtk.TextView.do_insert_at_cursor(self.code_editor, "foo")
-        self.throttle(200)
-        gtk_iteration()
+        self.flush_debounce()
 
         autocompletion = self.user_interface.autocompletion
         self.assertTrue(autocompletion.visible)
 
         self.press_key(Gdk.KEY_Down)
         self.press_key(Gdk.KEY_Return)
-        self.throttle(200)
-        gtk_iteration()
+        self.flush_debounce()
 
         # the first suggestion should have been selected
 
@@ -2141,22 +2174,20 @@ class TestAutocompletion(GuiTestBase):
         # should be shown
         Gtk.TextView.do_insert_at_cursor(self.code_editor, " + foo ")
 
-        time.sleep(0.11)
-        gtk_iteration()
+        self.flush_debounce()
 
         self.assertFalse(autocompletion.visible)
 
     def test_autocomplete_function(self):
         self.controller.update_mapping(output_symbol="")
-        gtk_iteration()
+        self.run_until_stable()
 
         source_view = self.focus_source_view()
 
         incomplete = "key(KEY_A).\nepea"
         Gtk.TextView.do_insert_at_cursor(source_view, incomplete)
 
-        time.sleep(0.11)
-        gtk_iteration()
+        self.flush_debounce()
 
         autocompletion = self.user_interface.autocompletion
         self.assertTrue(autocompletion.visible)
@@ -2170,14 +2201,13 @@ class TestAutocompletion(GuiTestBase):
 
     def test_close_autocompletion(self):
         self.controller.update_mapping(output_symbol="")
-        gtk_iteration()
+        self.run_until_stable()
 
         source_view = self.focus_source_view()
 
         Gtk.TextView.do_insert_at_cursor(source_view, "KEY_")
 
-        time.sleep(0.11)
-        gtk_iteration()
+        self.flush_debounce()
 
         autocompletion = self.user_interface.autocompletion
         self.assertTrue(autocompletion.visible)
@@ -2192,15 +2222,14 @@ class TestAutocompletion(GuiTestBase):
 
     def test_writing_still_works(self):
         self.controller.update_mapping(output_symbol="")
-        gtk_iteration()
+        self.run_until_stable()
         source_view = self.focus_source_view()
 
         Gtk.TextView.do_insert_at_cursor(source_view, "KEY_")
 
         autocompletion = self.user_interface.autocompletion
 
-        time.sleep(0.11)
-        gtk_iteration()
+        self.flush_debounce()
         self.assertTrue(autocompletion.visible)
 
         # writing still works while an entry is selected
@@ -2208,28 +2237,25 @@ class TestAutocompletion(GuiTestBase):
 
         Gtk.TextView.do_insert_at_cursor(source_view, "A")
 
-        time.sleep(0.11)
-        gtk_iteration()
+        self.flush_debounce()
         self.assertTrue(autocompletion.visible)
 
         Gtk.TextView.do_insert_at_cursor(source_view, "1234foobar")
 
-        time.sleep(0.11)
-        gtk_iteration()
+        self.flush_debounce()
         # no key matches this completion, so it closes again
         self.assertFalse(autocompletion.visible)
 
     def test_cycling(self):
         self.controller.update_mapping(output_symbol="")
-        gtk_iteration()
+        self.run_until_stable()
         source_view = self.focus_source_view()
 
         Gtk.TextView.do_insert_at_cursor(source_view, "KEY_")
 
         autocompletion = self.user_interface.autocompletion
 
-        time.sleep(0.11)
-        gtk_iteration()
+        self.flush_debounce()
         self.assertTrue(autocompletion.visible)
 
         self.assertEqual(
@@ -2249,7 +2275,44 @@ class TestAutocompletion(GuiTestBase):
         )
 
 
+class FakeTimeouts:
+    """Replaces the GLib timeouts of debounce, with a clock that has to be advanced."""
+
+    def __init__(self):
+        self.now = 0
+        self._next_id = 1
+        self._timeouts: Dict[int, Tuple[int, Callable]] = {}
+
+    def timeout_add(self, timeout_ms: int, callback: Callable) -> int:
+        source_id = self._next_id
+        self._next_id += 1
+        self._timeouts[source_id] = (self.now + timeout_ms, callback)
+        return source_id
+
+    def source_remove(self, source_id: int):
+        self._timeouts.pop(source_id, None)
+
+    def advance(self, ms: int):
+        """Move the clock forward and run all timeouts that are due."""
+        self.now += ms
+        due = sorted(
+            (item for item in self._timeouts.items() if item[1][0] <= self.now),
+            key=lambda item: item[1][0],
+        )
+        for source_id, (_, callback) in due:
+            if self._timeouts.pop(source_id, None) is not None:
+                callback()
+
+
 class TestDebounce(unittest.TestCase):
+    def setUp(self):
+        self.timeouts = FakeTimeouts()
+        patcher = patch("inputremapper.gui.utils.GLib", self.timeouts)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # runs before the patch is undone, so that no fake source ids reach GLib
+        self.addCleanup(debounce_manager.stop_all)
+
     def test_debounce(self):
         calls = 0
 
@@ -2272,26 +2335,21 @@ class TestDebounce(unittest.TestCase):
         self.assertEqual(calls, 0)
 
         a.foo()
-        gtk_iteration()
         self.assertEqual(calls, 0)
 
         b.foo()
-        gtk_iteration()
         self.assertEqual(calls, 0)
 
-        time.sleep(0.021)
-        gtk_iteration()
+        self.timeouts.advance(21)
         self.assertEqual(calls, 2)
 
         a.foo()
         b.foo()
         a.foo()
         b.foo()
-        gtk_iteration()
         self.assertEqual(calls, 2)
 
-        time.sleep(0.021)
-        gtk_iteration()
+        self.timeouts.advance(21)
         self.assertEqual(calls, 4)
 
     def test_run_all_now(self):
@@ -2305,15 +2363,13 @@ class TestDebounce(unittest.TestCase):
 
         a = A()
         a.foo()
-        gtk_iteration()
         self.assertEqual(calls, 0)
 
         debounce_manager.run_all_now()
         self.assertEqual(calls, 1)
 
         # waiting for some time will not call it again
-        time.sleep(0.021)
-        gtk_iteration()
+        self.timeouts.advance(21)
         self.assertEqual(calls, 1)
 
     def test_stop_all(self):
@@ -2327,14 +2383,12 @@ class TestDebounce(unittest.TestCase):
 
         a = A()
         a.foo()
-        gtk_iteration()
         self.assertEqual(calls, 0)
 
         debounce_manager.stop_all()
 
         # waiting for some time will not call it
-        time.sleep(0.021)
-        gtk_iteration()
+        self.timeouts.advance(21)
         self.assertEqual(calls, 0)
 
     def test_stop(self):
@@ -2348,14 +2402,12 @@ class TestDebounce(unittest.TestCase):
 
         a = A()
         a.foo()
-        gtk_iteration()
         self.assertEqual(calls, 0)
 
         debounce_manager.stop(a, a.foo)
 
         # waiting for some time will not call it
-        time.sleep(0.021)
-        gtk_iteration()
+        self.timeouts.advance(21)
         self.assertEqual(calls, 0)
 
 
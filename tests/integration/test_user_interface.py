@@ -1,14 +1,9 @@
 import unittest
 from unittest.mock import MagicMock
 
-import gi
 from evdev.ecodes import EV_KEY, KEY_A
 
-gi.require_version("Gdk", "3.0")
-gi.require_version("Gtk", "3.0")
-gi.require_version("GLib", "2.0")
-gi.require_version("GtkSource", "4")
-from gi.repository import Gtk, Gdk, GLib
+from tests.lib.gtk import Gtk, Gdk, GLib
 
 from tests.lib.cleanup import quick_cleanup
 from inputremapper.gui.utils import gtk_iteration
@@ -23,15 +23,13 @@ import unittest
 from typing import List
 from unittest.mock import patch, MagicMock, call
 
-import gi
 from evdev.ecodes import EV_ABS, ABS_X, ABS_Y, ABS_RX
 
 from inputremapper.configs.system_mapping import system_mapping
 from inputremapper.injection.injector import InjectorState
 from tests.lib.logger import logger
 
-gi.require_version("Gtk", "3.0")
-from gi.repository import Gtk
+from tests.lib.gtk import Gtk
 
 from inputremapper.configs.input_config import InputCombination, InputConfig
 from inputremapper.groups import _Groups
@@ -482,7 +480,7 @@ class TestController(unittest.TestCase):
             calls.append(data)
 
         self.message_broker.subscribe(MessageType.mapping, f)
-        self.controller.create_mapping()
+        self.assertTrue(self.controller.create_mapping())
 
         self.assertEqual(calls[-1], UIMapping(**MAPPING_DEFAULTS))
 
@@ -500,7 +498,8 @@ class TestController(unittest.TestCase):
         self.message_broker.subscribe(MessageType.mapping, f)
         self.message_broker.subscribe(MessageType.preset, f)
 
-        self.controller.create_mapping()  # try to create a second one
+        # try to create a second one
+        self.assertFalse(self.controller.create_mapping())
         self.assertEqual(len(calls), 0)
 
     def test_delete_mapping_asks_for_confirmation(self):
@@ -23,8 +23,9 @@
 
 
 import asyncio
+import time
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, AsyncMock, patch
 
 import evdev
 from evdev.ecodes import (
@@ -51,7 +52,10 @@ from inputremapper.configs.input_config import InputCombination, InputConfig
 from inputremapper.injection.global_uinputs import global_uinputs
 from inputremapper.injection.mapping_handlers.abs_to_abs_handler import AbsToAbsHandler
 from inputremapper.injection.mapping_handlers.abs_to_btn_handler import AbsToBtnHandler
-from inputremapper.injection.mapping_handlers.abs_to_rel_handler import AbsToRelHandler
+from inputremapper.injection.mapping_handlers.abs_to_rel_handler import (
+    AbsToRelHandler,
+    YIELD_INTERVAL_WHEN_BEHIND,
+)
 from inputremapper.injection.mapping_handlers.rel_to_rel_handler import RelToRelHandler
 from inputremapper.injection.mapping_handlers.axis_switch_handler import (
     AxisSwitchHandler,
@@ -241,6 +245,128 @@ class TestAbsToRelHandler(BaseTests, unittest.IsolatedAsyncioTestCase):
         await asyncio.sleep(0.2)
         self.assertEqual(count, global_uinputs.get_uinput("mouse").write_count)
 
+    def _move(self, value, actions=()):
+        self.handler.notify(
+            InputEvent(0, 0, EV_ABS, ABS_X, value, actions=actions),
+            source=InputDevice("/dev/input/event15"),
+        )
+
+    def _write_count(self):
+        return global_uinputs.get_uinput("mouse").write_count
+
+    async def _test_resumes_after_stop(self, stop):
+        self._move(MAX_ABS)
+        await asyncio.sleep(0.1)
+        task = self.handler._task
+        self.assertIsNotNone(task)
+
+        stop()
+        await asyncio.sleep(0.05)
+        count = self._write_count()
+        await asyncio.sleep(0.1)
+        self.assertEqual(count, self._write_count())
+
+        self._move(MAX_ABS)
+        await asyncio.sleep(0.1)
+        self.assertGreater(self._write_count(), count)
+        # the same task is used for the next movement
+        self.assertIs(self.handler._task, task)
+
+    async def test_resumes_after_recenter(self):
+        await self._test_resumes_after_stop(
+            lambda: self._move(0, actions=(EventActions.recenter,))
+        )
+
+    async def test_resumes_after_zero(self):
+        await self._test_resumes_after_stop(lambda: self._move(0))
+
+    async def test_reset_cancels_task(self):
+        self._move(MAX_ABS)
+        await asyncio.sleep(0.05)
+        task = self.handler._task
+
+        self.handler.reset()
+        self.assertIsNone(self.handler._task)
+        await asyncio.sleep(0.01)
+        self.assertTrue(task.cancelled())
+
+        count = self._write_count()
+        await asyncio.sleep(0.1)
+        self.assertEqual(count, self._write_count())
+
+    async def test_no_burst_after_falling_behind(self):
+        self._move(MAX_ABS)
+        await asyncio.sleep(0.05)
+
+        # block the event loop for about 12 ticks
+        time.sleep(0.2)
+        count = self._write_count()
+        await asyncio.sleep(0.05)
+
+        # continues at the regular rate of about 3 ticks in 0.05s, instead of
+        # writing the missed ticks all at once
+        self.assertLess(self._write_count() - count, 6)
+        self.handler.reset()
+
+    async def test_deadline_snaps_to_now(self):
+        loop = asyncio.get_running_loop()
+        period = self.handler._period
+        now = loop.time()
+
+        deadline = await self.handler._sleep_until(loop, now - period * 5)
+
+        # the next tick is one period after now, not after the missed deadline
+        self.assertGreaterEqual(deadline, now + period)
+        self.assertLess(deadline, now + period * 2)
+
+    async def test_yields_while_behind(self):
+        loop = asyncio.get_running_loop()
+        period = self.handler._period
+
+        with patch.object(asyncio, "sleep", new=AsyncMock()) as sleep:
+            # late for each tick, but not by more than a period
+            for _ in range(YIELD_INTERVAL_WHEN_BEHIND - 1):
+                await self.handler._sleep_until(loop, loop.time() - period / 2)
+
+            sleep.assert_not_awaited()
+
+            for _ in range(YIELD_INTERVAL_WHEN_BEHIND * 2 + 1):
+                await self.handler._sleep_until(loop, loop.time() - period / 2)
+
+            # still gives other coroutines a chance to run on every nth tick
+            self.assertEqual(sleep.await_count, 3)
+            sleep.assert_awaited_with(0)
+
+    async def test_stop_wakes_up_immediately(self):
+        input_combination = InputCombination([InputConfig(type=EV_ABS, code=ABS_X)])
+        self.handler = AbsToRelHandler(
+            input_combination,
+            Mapping(
+                input_combination=input_combination.to_config(),
+                target_uinput="mouse",
+                output_type=EV_REL,
+                output_code=REL_X,
+                # one tick per second
+                rel_rate=1,
+            ),
+        )
+
+        # writes once, and then sleeps until the next tick
+        self._move(MAX_ABS)
+        await asyncio.sleep(0.05)
+        count = self._write_count()
+        self.assertEqual(count, 1)
+
+        # the loop doesn't wait for the end of the tick, so it writes right away
+        # when the next movement starts
+        self._move(0)
+        await asyncio.sleep(0.01)
+        self._move(MAX_ABS)
+        await asyncio.sleep(0.05)
+        self.assertEqual(self._write_count(), count + 1)
+
+        self.handler.reset()
+
 
 class TestCombinationHandler(BaseTests, unittest.IsolatedAsyncioTestCase):
     handler: CombinationHandler
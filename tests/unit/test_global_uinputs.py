@@ -84,6 +84,26 @@ class TestGlobalUinputs(unittest.TestCase):
         with self.assertRaises(UinputNotAvailable):
             global_uinputs.write(ev_1.event_tuple, "foo")
 
+    def test_write_batch(self):
+        ev_1 = InputEvent.key(KEY_A, 1)
+        ev_2 = InputEvent.abs(ABS_X, 10)
+
+        keyboard = global_uinputs.get_uinput("keyboard")
+
+        global_uinputs.write_batch([ev_1.event_tuple, ev_1.event_tuple], "keyboard")
+        self.assertEqual(keyboard.write_count, 2)
+
+        # nothing is written if one of the events can't be emitted
+        with self.assertRaises(EventNotHandled):
+            global_uinputs.write_batch(
+                [ev_1.event_tuple, ev_2.event_tuple],
+                "keyboard",
+            )
+        self.assertEqual(keyboard.write_count, 2)
+
+        with self.assertRaises(UinputNotAvailable):
+            global_uinputs.write_batch([ev_1.event_tuple], "foo")
+
     def test_creates_frontend_uinputs(self):
         frontend_uinputs = GlobalUInputs()
         with patch.object(sys, "argv", ["foo"]):